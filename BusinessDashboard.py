@@ -1,132 +1,173 @@
+import math
+import os
+import re
+import tempfile
+
 import pandas as pd
 import streamlit as st
 import plotly.express as px
 import numpy as np
+import pyarrow as pa
 
 st.set_page_config(page_title="Business Performance Dashboard", layout="wide")
 
-company_df = pd.read_csv("Financials.csv")
-company_df.columns = company_df.columns.str.strip()
-
-company_df['Year'] = company_df['Year'].round().astype(int)
-company_df['Month Number'] = company_df['Month Number'].astype(int)
-company_df['Date'] = pd.to_datetime(company_df['Date'], errors='coerce')
-
 numeric_columns = ['Units Sold', 'Manufacturing Price', 'Sale Price', 'Gross Sales', 'Discounts', 'Sales', 'COGS', 'Profit']
-
-for column in numeric_columns:
-    if column in company_df.columns:
-        company_df[column] = company_df[column].replace(
-            {'\$': '', ',': '', '-': '', '': np.nan, 'N/A': np.nan, 'None': np.nan, '---': np.nan}, regex=True
-        )
-
-for column in numeric_columns:
-    if column in company_df.columns:
-        company_df[column] = pd.to_numeric(company_df[column], errors='coerce')
-
-for column in numeric_columns:
-    if column in company_df.columns:
-        if (company_df[column] < 0).any():
-            print(f"Negative values found in {column}. Correcting them to zero.")
-            company_df[column] = company_df[column].apply(lambda x: max(x, 0))
-    else:
-        print(f"Column '{column}' not found in DataFrame.")
-
-company_df['Profit'] = company_df.apply(
-    lambda row: row['Sales'] - row['COGS'] if pd.isna(row['Profit']) else row['Profit'],
-    axis=1
-)
-
-nan_summary_after_fix = company_df['Profit'].isna().sum()
-
-def detect_outliers(company_df, columns):
-    outliers = {}
-    for column in columns:
-        Q1 = company_df[column].quantile(0.25)
-        Q3 = company_df[column].quantile(0.75)
+category_columns = ['Segment', 'Country', 'Product', 'Month Name']
+summed_metrics = {"Sales": "sum", "Profit": "sum", "Discounts": "sum"}
+raw_page_size = 1000
+data_path = "Financials.csv"
+currency_pattern = re.compile(r"[$,\-]")
+
+@st.cache_data
+def load_and_clean(path: str) -> pd.DataFrame:
+    parquet_path = os.path.splitext(path)[0] + ".parquet"
+    source_mtime = max(os.path.getmtime(path), os.path.getmtime(__file__))
+    if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= source_mtime:
+        try:
+            return pd.read_parquet(parquet_path)
+        except (OSError, pa.ArrowException):
+            print(f"Could not read '{parquet_path}'. Rebuilding it from '{path}'.")
+
+    company_df = pd.read_csv(path, engine="pyarrow")
+    company_df.columns = company_df.columns.str.strip()
+
+    company_df['Year'] = company_df['Year'].round().astype('int16')
+    company_df['Month Number'] = company_df['Month Number'].astype('int8')
+    company_df['Date'] = pd.to_datetime(company_df['Date'], errors='coerce', format='%d/%m/%Y', cache=True)
+
+    for column in category_columns:
+        if column in company_df.columns:
+            company_df[column] = company_df[column].astype('category')
+
+    present_columns = [column for column in numeric_columns if column in company_df.columns]
+    company_df[present_columns] = company_df[present_columns].apply(
+        lambda s: pd.to_numeric(s.replace(currency_pattern, '', regex=True), errors='coerce')
+    )
+
+    for column in numeric_columns:
+        if column not in company_df.columns:
+            print(f"Column '{column}' not found in DataFrame.")
+
+    negative_columns = (company_df[present_columns] < 0).any()
+    for column in negative_columns[negative_columns].index:
+        print(f"Negative values found in {column}. Correcting them to zero.")
+    company_df[present_columns] = company_df[present_columns].clip(lower=0)
+
+    company_df['Profit'] = company_df['Profit'].fillna(company_df['Sales'] - company_df['COGS'])
+
+    numeric_values = np.asfortranarray(company_df[present_columns].to_numpy(dtype=float))
+    if len(numeric_values):
+        Q1, Q3 = np.nanquantile(numeric_values, [0.25, 0.75], axis=0)
         IQR = Q3 - Q1
-        lower_bound = Q1 - 1.5 * IQR
-        upper_bound = Q3 + 1.5 * IQR
-        outliers[column] = company_df[(company_df[column] < lower_bound) | (company_df[column] > upper_bound)]
-    return outliers
-
-outliers = detect_outliers(company_df, numeric_columns)
-
-for column in numeric_columns:
-    Q1 = company_df[column].quantile(0.25)
-    Q3 = company_df[column].quantile(0.75)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-    company_df[column] = np.where(company_df[column] < lower_bound, lower_bound, company_df[column])
-    company_df[column] = np.where(company_df[column] > upper_bound, upper_bound, company_df[column])
+        np.clip(numeric_values, Q1 - 1.5 * IQR, Q3 + 1.5 * IQR, out=numeric_values)
+    numeric_block = pd.DataFrame(numeric_values, columns=present_columns, index=company_df.index)
+    company_df = pd.concat([company_df.drop(columns=present_columns), numeric_block], axis=1)[company_df.columns]
+
+    temp_path = None
+    try:
+        fd, temp_path = tempfile.mkstemp(
+            dir=os.path.dirname(parquet_path) or ".", prefix=os.path.basename(parquet_path) + ".", suffix=".tmp"
+        )
+        with os.fdopen(fd, "wb") as temp_file:
+            company_df.to_parquet(temp_file)
+        os.replace(temp_path, parquet_path)
+    except (OSError, pa.ArrowException):
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        print(f"Could not write '{parquet_path}'. Continuing without the Parquet cache.")
+    return company_df
+
+@st.cache_data
+def build_aggregates(path: str) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, pd.DataFrame]:
+    company_df = load_and_clean(path)
+    monthly_data = company_df.groupby(
+        ["Year", "Month Number", "Month Name"], as_index=False, observed=True, sort=True
+    ).agg(summed_metrics)
+    segment_data = company_df.groupby("Segment", as_index=False, observed=True).agg(summed_metrics)
+    country_data = company_df.groupby("Country", as_index=False, observed=True).agg(summed_metrics)
+    product_data = company_df.groupby("Product", as_index=False, observed=True).agg(summed_metrics)
+    return monthly_data, segment_data, country_data, product_data.nlargest(10, "Sales")
+
+@st.cache_data
+def build_monthly_fig(monthly_data: pd.DataFrame):
+    return px.line(
+        monthly_data,
+        x="Month Name",
+        y=["Sales", "Profit"],
+        color="Year",
+        labels={"value": "Amount ($)", "Month Name": "Month"},
+        title="Monthly Sales and Profit Trends",
+    )
+
+@st.cache_data
+def build_segment_fig(segment_data: pd.DataFrame):
+    return px.bar(
+        segment_data,
+        x="Segment",
+        y=["Sales", "Profit", "Discounts"],
+        barmode="group",
+        labels={"value": "Amount ($)", "Segment": "Business Segment"},
+        title="Sales, Profit, and Discounts by Segment",
+    )
+
+@st.cache_data
+def build_country_fig(country_data: pd.DataFrame):
+    return px.choropleth(
+        country_data,
+        locations="Country",
+        locationmode="country names",
+        color="Sales",
+        hover_name="Country",
+        title="Total Sales by Country",
+        color_continuous_scale="Viridis",
+    )
+
+@st.cache_data
+def build_product_fig(top_products: pd.DataFrame):
+    return px.bar(
+        top_products,
+        x="Product",
+        y="Sales",
+        color="Profit",
+        labels={"Sales": "Sales ($)", "Product": "Product Name"},
+        title="Top 10 Products by Sales",
+    )
+
+company_df = load_and_clean(data_path)
+monthly_data, segment_data, country_data, top_products = build_aggregates(data_path)
 
 st.title("Business Performance Dashboard")
 
-total_sales = company_df["Sales"].sum()
-total_profit = company_df["Profit"].sum()
-total_discounts = company_df["Discounts"].sum()
+totals = company_df[["Sales", "Profit", "Discounts"]].sum()
 
 col1, col2, col3 = st.columns(3)
-col1.metric("Total Sales", f"${total_sales:,.2f}")
-col2.metric("Total Profit", f"${total_profit:,.2f}")
-col3.metric("Total Discounts", f"${total_discounts:,.2f}")
+col1.metric("Total Sales", f"${totals['Sales']:,.2f}")
+col2.metric("Total Profit", f"${totals['Profit']:,.2f}")
+col3.metric("Total Discounts", f"${totals['Discounts']:,.2f}")
 
 st.subheader("Sales and Profit Trends by Month")
-monthly_data = company_df.groupby(["Year", "Month Number", "Month Name"]).agg(
-    {"Sales": "sum", "Profit": "sum"}
-).reset_index()
-monthly_data = monthly_data.sort_values(by=["Year", "Month Number"])
-
-fig = px.line(
-    monthly_data,
-    x="Month Name",
-    y=["Sales", "Profit"],
-    color="Year",
-    labels={"value": "Amount ($)", "Month Name": "Month"},
-    title="Monthly Sales and Profit Trends",
-)
+fig = build_monthly_fig(monthly_data)
 st.plotly_chart(fig, use_container_width=True)
 
 st.subheader("Performance by Segment")
-segment_data = company_df.groupby("Segment").agg(
-    {"Sales": "sum", "Profit": "sum", "Discounts": "sum"}
-).reset_index()
-fig_segment = px.bar(
-    segment_data,
-    x="Segment",
-    y=["Sales", "Profit", "Discounts"],
-    barmode="group",
-    labels={"value": "Amount ($)", "Segment": "Business Segment"},
-    title="Sales, Profit, and Discounts by Segment",
-)
+fig_segment = build_segment_fig(segment_data)
 st.plotly_chart(fig_segment, use_container_width=True)
 
 st.subheader("Performance by Country")
-country_data = company_df.groupby("Country").agg({"Sales": "sum", "Profit": "sum"}).reset_index()
-fig_country = px.choropleth(
-    country_data,
-    locations="Country",
-    locationmode="country names",
-    color="Sales",
-    hover_name="Country",
-    title="Total Sales by Country",
-    color_continuous_scale="Viridis",
-)
+fig_country = build_country_fig(country_data)
 st.plotly_chart(fig_country, use_container_width=True)
 
 st.subheader("Top Performing Products")
-product_data = company_df.groupby("Product").agg({"Sales": "sum", "Profit": "sum"}).reset_index()
-top_products = product_data.nlargest(10, "Sales")
-fig_product = px.bar(
-    top_products,
-    x="Product",
-    y="Sales",
-    color="Profit",
-    labels={"Sales": "Sales ($)", "Product": "Product Name"},
-    title="Top 10 Products by Sales",
-)
+fig_product = build_product_fig(top_products)
 st.plotly_chart(fig_product, use_container_width=True)
 
 st.subheader("Raw Data")
-st.dataframe(company_df)
+page_count = max(1, math.ceil(len(company_df) / raw_page_size))
+page = st.number_input("Page", min_value=1, max_value=page_count, value=1, step=1)
+page_start = (page - 1) * raw_page_size
+page_df = company_df.iloc[page_start:page_start + raw_page_size]
+if page_df.empty:
+    st.caption("No rows to display.")
+else:
+    st.caption(f"Showing rows {page_start + 1:,}-{page_start + len(page_df):,} of {len(company_df):,}")
+st.dataframe(page_df)